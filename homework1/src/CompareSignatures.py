@@ -1,4 +1,8 @@
-from typing import List
+from typing import Sequence, Union
+
+import numpy as np
+
+Signature = Union[Sequence[int], np.ndarray]
 
 class CompareSignatures:
     """
@@ -6,14 +10,14 @@ class CompareSignatures:
     """
 
     @staticmethod
-    def calculate_similarity(sig_a: List[int], sig_b: List[int]) -> float:
+    def calculate_similarity(sig_a: Signature, sig_b: Signature) -> float:
         """
         Estimates the Jaccard similarity of the original sets by comparing their MinHash signatures.
         The similarity is the fraction of signature components that are equal.
 
         Args:
-            sig_a (List[int]): The MinHash signature for set A.
-            sig_b (List[int]): The MinHash signature for set B.
+            sig_a (Signature): The MinHash signature for set A (list or NumPy array).
+            sig_b (Signature): The MinHash signature for set B (list or NumPy array).
 
         Returns:
             float: The estimated Jaccard similarity (0.0 to 1.0).
@@ -25,14 +29,83 @@ class CompareSignatures:
             # By definition, two empty sets are 100% similar
             return 1.0  
 
-        # Count the number of components that match
-        matches = 0
-        for i in range(len(sig_a)):
-            if sig_a[i] == sig_b[i]:
-                matches += 1
-        
+        a = np.asarray(sig_a, dtype=np.int64)
+        b = np.asarray(sig_b, dtype=np.int64)
+
         # The estimate is the fraction of matching components
-        return matches / len(sig_a)
+        return float(np.count_nonzero(a == b)) / a.size
+
+    @staticmethod
+    def calculate_similarity_batch(sig_matrix: np.ndarray, query: Signature) -> np.ndarray:
+        """
+        Estimates the similarity between one signature and many stored signatures at once.
+
+        Args:
+            sig_matrix (np.ndarray): Matrix of shape (N, n) with one MinHash signature per row.
+            query (Signature): The MinHash signature (length n) to compare against every row.
+
+        Returns:
+            np.ndarray: Array of length N with the estimated Jaccard similarity of each row.
+        """
+        sig_matrix = np.asarray(sig_matrix, dtype=np.int64)
+        query = np.asarray(query, dtype=np.int64)
+
+        if sig_matrix.ndim != 2 or sig_matrix.shape[1] != query.size:
+            raise ValueError("Signatures must be of the same length to be compared")
+
+        if query.size == 0:
+            return np.ones(sig_matrix.shape[0])
+
+        return np.count_nonzero(sig_matrix == query, axis=1) / query.size
+
+    @staticmethod
+    def pack_signature(signature: Signature) -> np.ndarray:
+        """
+        Builds a one-bit MinHash: keeps only the lowest bit of every signature component
+        and packs the bits into uint64 words (n/64 words instead of n integers).
+
+        Args:
+            signature (Signature): The MinHash signature (list or NumPy array).
+
+        Returns:
+            np.ndarray: The packed bits as a uint64 array (zero-padded to a whole word).
+        """
+        bits = np.packbits(np.asarray(signature, dtype=np.int64) & 1)
+        padded = np.zeros(-(-bits.size // 8) * 8, dtype=np.uint8)
+        padded[:bits.size] = bits
+        return padded.view(np.uint64)
+
+    @staticmethod
+    def calculate_similarity_packed(packed_a: np.ndarray, packed_b: np.ndarray, num_hashes: int) -> float:
+        """
+        Estimates the Jaccard similarity from two one-bit MinHash signatures (see pack_signature).
+
+        Two components have the same lowest bit when the MinHash values match (probability J)
+        or, by chance, half of the remaining times, so P(equal bit) = J + (1 - J) / 2 and
+        J is estimated as 2 * P(equal bit) - 1. Mismatching bits are counted with a popcount.
+
+        Args:
+            packed_a (np.ndarray): The packed signature for set A.
+            packed_b (np.ndarray): The packed signature for set B.
+            num_hashes (int): The length n of the original signatures.
+
+        Returns:
+            float: The estimated Jaccard similarity (0.0 to 1.0).
+        """
+        if packed_a.shape != packed_b.shape:
+            raise ValueError("Signatures must be of the same length to be compared")
+
+        if num_hashes == 0:
+            return 1.0
+
+        diff = np.bitwise_xor(packed_a, packed_b)
+        if hasattr(np, "bitwise_count"):  # NumPy >= 2.0
+            mismatches = int(np.bitwise_count(diff).sum())
+        else:
+            mismatches = int(np.unpackbits(diff.view(np.uint8)).sum())
+
+        equal_fraction = 1.0 - mismatches / num_hashes
+        return max(0.0, 2.0 * equal_fraction - 1.0)
 
 # -----------------------------------------------------------------
 # Test block
@@ -46,4 +119,11 @@ if __name__ == "__main__":
     print(f"\nSignature 1: {sig1}")
     print(f"Signature 2: {sig2}")
     print(f"\nSignature Length: {len(sig1)}")
-    print(f"Estimated Jaccard Similarity: {estimated_sim:.4f} (Expected: 0.6)")
\ No newline at end of file
+    print(f"Estimated Jaccard Similarity: {estimated_sim:.4f} (Expected: 0.6)")
+
+    batch_sims = CompareSignatures.calculate_similarity_batch(np.array([sig1, sig2]), sig1)
+    print(f"Batch similarities to Signature 1: {batch_sims} (Expected: [1.  0.6])")
+
+    packed_sim = CompareSignatures.calculate_similarity_packed(
+        CompareSignatures.pack_signature(sig1), CompareSignatures.pack_signature(sig2), len(sig1))
+    print(f"One-bit MinHash estimate: {packed_sim:.4f} (noisy with only {len(sig1)} bits)")
\ No newline at end of file
@@ -1,19 +1,25 @@
-import zlib
-from typing import List, Set, Dict, Any, Tuple
+from typing import List, Set, Dict, Any, Tuple, Sequence, Iterator, Optional
 from itertools import combinations
 
+import numpy as np
+
 class LSH:
     """
     Implements Locality-Sensitive Hashing (LSH) for MinHash signatures to find candidate pairs of similar documents.
     """
 
-    def __init__(self, num_bands: int, num_hashes: int):
+    # Seed of the band hash coefficients, fixed so bucket keys are reproducible
+    BAND_HASH_SEED = 42
+
+    def __init__(self, num_bands: int, num_hashes: int, max_bucket_size: Optional[int] = None):
         """
         Initializes the LSH index.
 
         Args:
             num_bands (int): The number of bands ('b') to split the signature into.
             num_hashes (int): The total length of the MinHash signatures ('n').
+            max_bucket_size (Optional[int]): Buckets holding more documents than this are
+                skipped when enumerating candidate pairs (None means no limit).
         
         Raises:
             ValueError: If num_hashes is not perfectly divisible by num_bands.
@@ -24,10 +30,15 @@ class LSH:
         self.num_bands = num_bands
         self.num_hashes = num_hashes
         self.rows_per_band = num_hashes // num_bands
+        self.max_bucket_size = max_bucket_size
         
-        self.hash_tables: List[Dict[int, List[Any]]] = [dict() for _ in range(self.num_bands)] #create hash tables, a list of empty dictionaries
+        self.hash_tables: List[Dict[int, Set[Any]]] = [dict() for _ in range(self.num_bands)] #create hash tables, a list of empty dictionaries
                                                                                                #every dictionary represent a hash table for the band
         
+        # Random odd 64-bit coefficients of the band hash (see _band_hashes)
+        rng = np.random.default_rng(self.BAND_HASH_SEED)
+        self.band_coeffs = rng.integers(0, 2**64, size=self.rows_per_band, dtype=np.uint64) | np.uint64(1)
+
         print(f"  Total Hashes (n): {self.num_hashes}")
         print(f"  Bands (b): {self.num_bands}")
         print(f"  Rows per Band (r): {self.rows_per_band}")
@@ -49,36 +60,79 @@ class LSH:
             raise ValueError(f"Signature length {len(signature)} does not match "
                             f"expected num_hashes {self.num_hashes}")
         
+        # Hash all the bands of the signature at once
+        bands = np.asarray(signature, dtype=np.int64).reshape(self.num_bands, self.rows_per_band)
+        bucket_hashes = self._band_hashes(bands).tolist()
+
         for b in range(self.num_bands): #loop towards all bands
-            # 1. Get the slice of the signature for the current band
-            start_row = b * self.rows_per_band
-            end_row = start_row + self.rows_per_band
-            band: List[int] = signature[start_row:end_row]
+            self._add_to_bucket(self.hash_tables[b], bucket_hashes[b], doc_id)
+
+    def add_signatures_batch(self, doc_ids: Sequence[Any], sig_matrix: np.ndarray):
+        """
+        Adds many documents' signatures to the LSH index at once.
+
+        All the D*b band hashes are computed in a single vectorized call, then every
+        band's hash table is filled in one pass. Equivalent to calling add_signature
+        for every (doc_id, signature) pair.
+
+        Args:
+            doc_ids (Sequence[Any]): The unique identifiers of the documents (length D).
+            sig_matrix (np.ndarray): Matrix of shape (D, n) with one MinHash signature per row.
+
+        Raises:
+            ValueError: If the matrix shape does not match the doc_ids and self.num_hashes.
+        """
+        sig_matrix = np.asarray(sig_matrix, dtype=np.int64)
+        if sig_matrix.ndim != 2 or sig_matrix.shape[1] != self.num_hashes:
+            raise ValueError(f"Signature matrix shape {sig_matrix.shape} does not match "
+                            f"expected num_hashes {self.num_hashes}")
+        if sig_matrix.shape[0] != len(doc_ids):
+            raise ValueError(f"Got {sig_matrix.shape[0]} signatures for {len(doc_ids)} doc_ids")
 
-            # 2. Hash the band content to a single bucket key.
-            band_bytes = str(band).encode('utf-8')
-            bucket_hash = zlib.crc32(band_bytes) & 0xffffffff
+        bands = sig_matrix.reshape(len(doc_ids), self.num_bands, self.rows_per_band)
+        bucket_hashes = self._band_hashes(bands)  # shape (D, b)
 
-            # 3. Add the doc_id to the appropriate bucket in the correct band's table
+        for b in range(self.num_bands):
             hash_table = self.hash_tables[b]
-            
-            if bucket_hash not in hash_table: #if a bucket doesn't exist add it with this document
-                hash_table[bucket_hash] = [doc_id]
-            else:
-                if doc_id not in hash_table[bucket_hash]: #if it already exists add the document (if not already present)
-                    hash_table[bucket_hash].append(doc_id)
+            for doc_id, bucket_hash in zip(doc_ids, bucket_hashes[:, b].tolist()):
+                self._add_to_bucket(hash_table, bucket_hash, doc_id)
 
-    def get_candidate_pairs(self) -> Set[Tuple[Any, Any]]:
+    def _band_hashes(self, bands: np.ndarray) -> np.ndarray:
         """
-        Finds all candidate pairs after all signatures have been added.
+        Hashes bands to bucket keys with a multilinear hash: sum_j band[j] * coeff[j] mod 2**64.
 
-        A pair is a candidate if it appears in the same bucket in at least one band.
+        Args:
+            bands (np.ndarray): Array whose last axis holds the r values of a band.
 
         Returns:
-            Set[Tuple[Any, Any]]: A set of unique candidate pairs.
-            Each pair is sorted to avoid duplicates.
+            np.ndarray: The uint64 bucket keys, with the last axis reduced.
         """
-        candidate_pairs: Set[Tuple[Any, Any]] = set()
+        # uint64 arithmetic wraps around, which gives the reduction mod 2**64 for free
+        return (bands.astype(np.uint64) * self.band_coeffs).sum(axis=-1, dtype=np.uint64)
+
+    @staticmethod
+    def _add_to_bucket(hash_table: Dict[int, Set[Any]], bucket_hash: int, doc_id: Any):
+        """Adds doc_id to the bucket of a band's hash table, creating the bucket if needed."""
+        bucket = hash_table.get(bucket_hash)
+        if bucket is None: #if a bucket doesn't exist add it with this document
+            hash_table[bucket_hash] = {doc_id}
+        else:
+            bucket.add(doc_id) #buckets are sets, so a document already present is not duplicated
+
+    def iter_candidate_pairs(self) -> Iterator[Tuple[Any, Any]]:
+        """
+        Yields the candidate pairs bucket by bucket, without materializing them all.
+
+        A pair is a candidate if it appears in the same bucket in at least one band.
+        Buckets larger than max_bucket_size are skipped: such giant buckets are mostly
+        uninformative collisions and would emit O(k^2) pairs each.
+
+        Yields:
+            Tuple[Any, Any]: A sorted candidate pair. A pair sharing a bucket in
+            several bands is yielded once per band.
+        """
+        max_size = self.max_bucket_size
+        skipped = 0
 
         # Iterate through each band's hash table
         for table in self.hash_tables:
@@ -86,9 +140,24 @@ class LSH:
             for bucket in table.values():
                 # If a bucket has 2 or more docs, they are candidates
                 if len(bucket) > 1:
-                    for pair in combinations(bucket, 2):
-                        # Sort the pair so (doc_A, doc_B) is the same as (doc_B, doc_A)
-                        sorted_pair = tuple(sorted(pair))
-                        candidate_pairs.add(sorted_pair)
-        
-        return candidate_pairs
+                    if max_size is not None and len(bucket) > max_size:
+                        skipped += 1
+                        continue
+                    # Sort the bucket once: combinations of a sorted sequence are already
+                    # sorted pairs, so (doc_A, doc_B) is the same as (doc_B, doc_A)
+                    yield from combinations(sorted(bucket), 2)
+
+        if skipped:
+            print(f"  Warning: skipped {skipped} buckets larger than max_bucket_size ({max_size})")
+
+    def get_candidate_pairs(self) -> Set[Tuple[Any, Any]]:
+        """
+        Finds all candidate pairs after all signatures have been added.
+
+        A pair is a candidate if it appears in the same bucket in at least one band.
+
+        Returns:
+            Set[Tuple[Any, Any]]: A set of unique candidate pairs.
+            Each pair is sorted to avoid duplicates.
+        """
+        return set(self.iter_candidate_pairs())
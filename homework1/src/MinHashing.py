@@ -1,14 +1,87 @@
 import random
-from typing import List, Iterable, Set
+from itertools import chain
+from typing import List, Iterable, Set, Sequence
+
+import numpy as np
+
+try:
+    from numba import njit, prange
+except ImportError:  # numba is optional, get_signature(s) fall back to NumPy
+    njit = None
+
+
+# A large prime number slightly larger than 2**32 (our max shingle hash)
+# This is our 'p' for the (a*x + b) % p hash function.
+MOD_PRIME = 4294967311
+
+
+if njit is not None:
+    @njit(parallel=True, boundscheck=False, cache=True)
+    def _minhash_kernel(x, A, B):
+        """
+        Compiled MinHash kernel: one independent min-reduction per hash function,
+        run in parallel over the hash functions.
+
+        Uses the same split multiplication as MinHashing._hash_block, so the
+        intermediate values never exceed 2**50. The prime is read from the module
+        global, which Numba freezes as a compile-time constant: the two modulo
+        operations become multiplications instead of 64-bit divisions.
+        """
+        p = MOD_PRIME
+        x_hi = x >> 16
+        x_lo = x & 0xffff
+        n = A.shape[0]
+        out = np.empty(n, dtype=np.int64)
+        for j in prange(n):
+            a = A[j]
+            b = B[j]
+            m = p
+            for i in range(x.shape[0]):
+                v = ((((a * x_hi[i]) % p) << 16) + a * x_lo[i] + b) % p
+                if v < m:
+                    m = v
+            out[j] = m
+        return out
+
+    @njit(parallel=True, boundscheck=False, cache=True)
+    def _minhash_corpus_kernel(x, offsets, A, B):
+        """
+        Compiled MinHash kernel for a whole corpus: documents are processed in
+        parallel, document d owning the shingles x[offsets[d]:offsets[d + 1]].
+        Empty documents get an all-zero signature, like in get_signature.
+        """
+        p = MOD_PRIME
+        x_hi = x >> 16
+        x_lo = x & 0xffff
+        n_docs = offsets.shape[0] - 1
+        n = A.shape[0]
+        out = np.zeros((n_docs, n), dtype=np.int64)
+        for d in prange(n_docs):
+            hi = x_hi[offsets[d]:offsets[d + 1]]
+            lo = x_lo[offsets[d]:offsets[d + 1]]
+            if hi.shape[0] == 0:
+                continue
+            for j in range(n):
+                a = A[j]
+                b = B[j]
+                m = p
+                for i in range(hi.shape[0]):
+                    v = ((((a * hi[i]) % p) << 16) + a * lo[i] + b) % p
+                    if v < m:
+                        m = v
+                out[d, j] = m
+        return out
 
 class MinHashing:
     """
     Creates MinHash signatures from sets of hashed shingles using universal hashing.
     """
 
-    # A large prime number slightly larger than 2**32 (our max shingle hash)
-    # This is our 'p' for the (a*x + b) % p hash function.
-    MOD_PRIME = 4294967311 
+    # The 'p' of the (a*x + b) % p hash functions (see the module constant)
+    MOD_PRIME = MOD_PRIME
+
+    # Upper bound on the size of the hash matrix computed at once by get_signature(s)
+    MAX_CHUNK_BYTES = 1024 * 1024
 
     def __init__(self, num_hashes: int, seed: int = 42):
         """
@@ -35,6 +108,10 @@ class MinHashing:
             b = rng.randint(1, self.MOD_PRIME - 1)
             self.hash_coeffs.append((a, b))
 
+        # Same coefficients as int64 arrays, so that all hash functions can be applied at once
+        self.A = np.fromiter((c[0] for c in self.hash_coeffs), dtype=np.int64, count=num_hashes)
+        self.B = np.fromiter((c[1] for c in self.hash_coeffs), dtype=np.int64, count=num_hashes)
+
     def get_signature(self, hashed_shingles: Iterable[int]) -> List[int]:
         """
         Computes the MinHash signature for a set of hashed shingles.
@@ -45,9 +122,6 @@ class MinHashing:
         Returns:
             List[int]: The MinHash signature (a list of length num_hashes).
         """
-        
-        # Initialize the signature vector with infinity
-        signature: List[float] = [float('inf')] * self.num_hashes
 
         # We only need to iterate over the unique shingles (convert in set to remove duplicates)
         shingles_set: Set[int] = set(hashed_shingles)
@@ -56,19 +130,93 @@ class MinHashing:
             # Return a default signature for empty sets
             return [0] * self.num_hashes 
 
-        # For each unique shingle apply 'num_hashes' hash functions
-        for shingle_hash in shingles_set: # for all unique shingle
-            for i in range(self.num_hashes): # for all hash function
-                a, b = self.hash_coeffs[i]
-                
-                # Compute the hash: h(x) = (a*x + b) % p
-                hash_val = (a * shingle_hash + b) % self.MOD_PRIME
+        x = np.fromiter(shingles_set, dtype=np.int64, count=len(shingles_set)) % self.MOD_PRIME
 
-                # Update the signature if this is the new minimum value found for this hash function
-                signature[i] = min(signature[i], hash_val)
-        
-        # Convert from float('inf') to int for the final signature
-        return [int(s) for s in signature]
+        if njit is not None:
+            return _minhash_kernel(x, self.A, self.B).tolist()
+
+        # Process the shingles in blocks of rows so the (rows x num_hashes) hash matrix stays small
+        rows_per_chunk = max(1, self.MAX_CHUNK_BYTES // (8 * self.num_hashes))
+
+        signature = np.full(self.num_hashes, self.MOD_PRIME, dtype=np.int64)
+        for start in range(0, len(x), rows_per_chunk):
+            H = self._hash_block(x[start:start + rows_per_chunk])
+
+            # Keep, for every hash function, the minimum value found so far
+            np.minimum(signature, H.min(axis=0), out=signature)
+
+        return signature.tolist()
+
+    def get_signatures(self, shingle_sets: Sequence[Iterable[int]]) -> np.ndarray:
+        """
+        Computes the MinHash signatures of a whole corpus at once.
+
+        The unique shingles of all the documents are concatenated in a single array
+        (document d owning rows offsets[d]:offsets[d + 1]), hashed block by block and
+        min-reduced per document with np.minimum.reduceat, so there is no Python loop
+        over the documents. Row d is equal to get_signature(shingle_sets[d]).
+
+        Args:
+            shingle_sets (Sequence[Iterable[int]]): The hashed shingles of each document.
+
+        Returns:
+            np.ndarray: Matrix of shape (len(shingle_sets), num_hashes) with one signature per row.
+        """
+        unique_sets = [set(s) for s in shingle_sets]
+        n_docs = len(unique_sets)
+
+        lengths = np.fromiter(map(len, unique_sets), dtype=np.int64, count=n_docs)
+        offsets = np.zeros(n_docs + 1, dtype=np.int64)
+        np.cumsum(lengths, out=offsets[1:])
+        x = np.fromiter(chain.from_iterable(unique_sets), dtype=np.int64, count=int(offsets[-1])) % self.MOD_PRIME
+
+        if njit is not None:
+            return _minhash_corpus_kernel(x, offsets, self.A, self.B)
+
+        signatures = np.full((n_docs, self.num_hashes), self.MOD_PRIME, dtype=np.int64)
+        doc_of_row = np.repeat(np.arange(n_docs), lengths)
+
+        # Same blocking as get_signature, a block of rows can span several documents
+        rows_per_chunk = max(1, self.MAX_CHUNK_BYTES // (8 * self.num_hashes))
+        for start in range(0, len(x), rows_per_chunk):
+            docs = doc_of_row[start:start + rows_per_chunk]
+
+            # First row of every document inside the block, and the per-document minimum
+            seg_starts = np.flatnonzero(np.r_[True, docs[1:] != docs[:-1]])
+            H = self._hash_block(x[start:start + rows_per_chunk])
+            partial = np.minimum.reduceat(H, seg_starts, axis=0)
+
+            # Only the first document of the block can have rows in the previous block
+            seg_docs = docs[seg_starts]
+            signatures[seg_docs] = np.minimum(signatures[seg_docs], partial)
+
+        # Default signature for empty documents
+        signatures[lengths == 0] = 0
+        return signatures
+
+    def _hash_block(self, x: np.ndarray) -> np.ndarray:
+        """
+        Applies all the hash functions to a block of shingles.
+
+        a*x does not fit in 64 bits (both are ~2**32), so x is split in a high and a low
+        16-bit half and the product is reduced modulo p in two steps:
+        h(x) = (((a*x_hi % p) << 16) + a*x_lo + b) % p
+
+        Args:
+            x (np.ndarray): Shingle hashes already reduced modulo MOD_PRIME.
+
+        Returns:
+            np.ndarray: Matrix H of shape (len(x), num_hashes) with H[i, j] = h_j(x[i]).
+        """
+        x_hi = (x >> 16)[:, None]
+        x_lo = (x & 0xffff)[:, None]
+
+        H = (self.A * x_hi) % self.MOD_PRIME
+        H <<= 16
+        H += self.A * x_lo
+        H += self.B
+        H %= self.MOD_PRIME
+        return H
 
 # -----------------------------------------------------------------
 # Test block
@@ -1,10 +1,14 @@
-import zlib
 from typing import List
 
+import numpy as np
+
 class Shingling:
     
     #Constructs k-shingles from a document, hashes them, and returns an ordered set of unique hash values.
     
+    # Rolling hash of a shingle: (c_0*BASE^k + c_1*BASE^(k-1) + ... + c_(k-1)*BASE) % 2**64
+    # BASE is odd, so it is invertible modulo 2**64 and the hash can be computed from prefix sums.
+    BASE = 0x9E3779B97F4A7C15
 
     def __init__(self, k: int):
         
@@ -17,6 +21,10 @@ class Shingling:
             raise ValueError("k must be a positive integer")
         self.k = k
 
+        # BASE and its inverse as uint64: NumPy uint64 arithmetic wraps, i.e. it is exact modulo 2**64
+        self.base = np.uint64(self.BASE)
+        self.base_inv = np.uint64(pow(self.BASE, -1, 2**64))
+
 
     def get_hashed_shingles(self, doc_text: str) -> List[int]:
         
@@ -27,24 +35,28 @@ class Shingling:
         if len(doc_text) < self.k:
             return []  # Not enough text to create any shingles
 
-        # Set to store unique hashed shingles
-        hashed_shingles_set = set()
+        # One code point per character, so a shingle is still k characters (not bytes) long
+        chars = np.frombuffer(doc_text.encode('utf-32-le'), dtype=np.uint32).astype(np.uint64)
+        n_chars = len(chars)
+        n_shingles = n_chars - self.k + 1
 
-        # Iterate through the document and create shingles
-        for i in range(len(doc_text) - self.k + 1):
-            # Get the k-shingle
-            shingle = doc_text[i : i + self.k]
+        # Rabin-Karp in one linear pass, independent of k:
+        #   prefix[t] = sum_{s <= t} c_s * BASE^-s
+        #   hash(i)   = (prefix[i+k-1] - prefix[i-1]) * BASE^(i+k)
+        pows = np.cumprod(np.full(n_chars, self.base, dtype=np.uint64))  # BASE^1 .. BASE^n
+        inv_pows = np.ones(n_chars, dtype=np.uint64)
+        inv_pows[1:] = np.cumprod(np.full(n_chars - 1, self.base_inv, dtype=np.uint64))
 
-            # Hash the shingle
-            shingle_bytes = shingle.encode('utf-8')
+        prefix = np.cumsum(chars * inv_pows, dtype=np.uint64)
+        window_sums = prefix[self.k - 1:].copy()
+        window_sums[1:] -= prefix[:n_shingles - 1]
+        hashes = window_sums * pows[self.k - 1:]
 
-            hash_val = zlib.crc32(shingle_bytes) & 0xffffffff
-            
-            # Add the unique hash to the set
-            hashed_shingles_set.add(hash_val)
+        # Keep the (better mixed) high 32 bits
+        hashes >>= np.uint64(32)
 
-        # Return an "ordered set" (a sorted list)
-        return sorted(list(hashed_shingles_set))
+        # Return an "ordered set" (a sorted list of unique hashes)
+        return np.unique(hashes).tolist()
 
 # -----------------------------------------------------------------
 # Test block
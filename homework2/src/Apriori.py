@@ -1,10 +1,20 @@
 #!/usr/bin/env python3
 import os
+import re
+import sys
 import csv
 from time import time
-from itertools import combinations
+from itertools import combinations, chain, islice
 from collections import defaultdict
-from multiprocessing import Pool, cpu_count
+from contextlib import contextmanager, ExitStack
+from multiprocessing import get_context, cpu_count, shared_memory
+
+import numpy as np
+
+try:
+    from numba import njit, prange, get_num_threads
+except ImportError:  # numba is optional, method="numba" falls back to count_supports_fast
+    njit = None
 
 # =====================
 # PARAMETERS
@@ -23,10 +33,17 @@ top_n_rules_to_print = 30  # top rules to show
 # =====================
 # HELPER FUNCTIONS
 # =====================
+DIGIT_RUN = re.compile(r"[0-9]+")  # items of a line that is not whitespace-separated
+
+
 def load_transactions(path):
     """
     Load and parse transaction data from file.
 
+    Items are normally separated by whitespace. A line that does not split into
+    integers (items separated by commas, stray characters) falls back to taking
+    every run of digits as an item.
+
     Args:
         path (str): Path to the data file
 
@@ -42,25 +59,10 @@ def load_transactions(path):
         raise FileNotFoundError(f"{path} not found.")
     with open(path, "r") as f:
         for line in f:
-            line = line.strip()
-            if not line:
-                continue
-            tokens = []
-            cur = ""
-            for ch in line:
-                if ch.isdigit():
-                    cur += ch
-                else:
-                    if cur:
-                        tokens.append(cur)
-                        cur = ""
-            if cur:
-                tokens.append(cur)
             try:
-                items = frozenset(int(t) for t in tokens) if tokens else frozenset()
+                items = set(map(int, line.split()))
             except ValueError:
-                parts = [p for p in line.split() if p.strip()]
-                items = frozenset(int(p) for p in parts)
+                items = set(map(int, DIGIT_RUN.findall(line)))
             if items:
                 transactions.append(sorted(items))  # store sorted list for faster processing
     return transactions
@@ -100,72 +102,214 @@ def apriori_gen(Lk_minus_1, k):
     candidates = set()
     len_prev = len(prev_itemsets)
     for i in range(len_prev):
+        a = prev_itemsets[i]
+        prefix = a[:k - 2]
         for j in range(i + 1, len_prev):
-            a = prev_itemsets[i]
             b = prev_itemsets[j]
-            if a[:k - 2] == b[:k - 2]:
-                new_candidate = tuple(sorted(set(a) | set(b)))
-                if len(new_candidate) == k:
-                    if all(tuple(sorted(subset)) in Lk_minus_1 for subset in combinations(new_candidate, k - 1)):
-                        candidates.add(new_candidate)
-            else:
+            if b[:k - 2] != prefix:
                 break
+            # a and b are sorted and share their first k-2 items, so a[-1] < b[-1]
+            new_candidate = a + (b[-1],)
+            # The first two (k-1)-subsets are a and b themselves, the others are sorted too
+            if all(subset in Lk_minus_1 for subset in islice(combinations(new_candidate, k - 1), 2, None)):
+                candidates.add(new_candidate)
     return candidates
 
 
+def build_candidate_trie(candidates):
+    """
+        Build a prefix tree (nested dicts) over sorted candidate itemsets.
+
+        Args:
+            candidates (iterable): Candidate itemsets, each a sorted tuple of size k
+
+        Returns:
+            dict: Trie where every inner level maps an item to the next level and
+                the last level maps the last item to the candidate tuple itself
+        """
+    trie = {}
+    for c in candidates:
+        node = trie
+        for item in c[:-1]:
+            node = node.setdefault(item, {})
+        node[c[-1]] = c
+    return trie
+
+
+def _count_trie_subsets(node, t, start, depth, counts):
+    """
+        Walk the candidate trie along the items of a sorted transaction, counting
+        every candidate contained in it. Only prefixes present in the trie are expanded.
+
+        Args:
+            node (dict): Current trie level
+            t (list): Sorted transaction
+            start (int): First position of t that can extend the current prefix
+            depth (int): Number of items still needed to reach a candidate
+            counts (dict): Support counts to update, with an entry for every candidate
+        """
+    if depth == 1:
+        for i in range(start, len(t)):
+            c = node.get(t[i])
+            if c is not None:
+                counts[c] += 1
+        return
+    for i in range(start, len(t) - depth + 1):
+        child = node.get(t[i])
+        if child is not None:
+            _count_trie_subsets(child, t, i + 1, depth - 1, counts)
+
+
 def count_supports_fast(candidates, transactions):
     """
-        Count support for candidate itemsets using efficient combination generation.
+        Count support for candidate itemsets by walking a candidate prefix tree,
+        instead of enumerating all the k-subsets of every transaction.
 
         Args:
-            candidates (set): Candidate itemsets to count
-            transactions (list): List of transactions
+            candidates (set): Candidate itemsets to count (sorted tuples)
+            transactions (list): List of transactions (sorted lists)
 
         Returns:
             dict: Support counts for each candidate itemset
         """
     k = len(next(iter(candidates))) if candidates else 0
-    candidate_sets = set(map(frozenset, candidates))
-    counts = defaultdict(int)
+    trie = build_candidate_trie(candidates)
+    counts = dict.fromkeys(candidates, 0)  # every key a trie leaf can reach already exists
+    if k == 0:
+        return counts
     for t in transactions:
         if len(t) >= k:
-            for subset in combinations(t, k):
-                fs = frozenset(subset)
-                if fs in candidate_sets:
-                    counts[tuple(sorted(fs))] += 1
+            _count_trie_subsets(trie, t, 0, k, counts)
     return counts
 
 
-def parallel_count_supports(args):
+# Transactions of a worker process, attached once by _init_worker
+_worker_transactions = None
+
+
+def _init_worker(items_name, offsets_name, n_transactions):
+    """
+        Pool initializer: rebuild the transactions from shared memory once per worker.
+
+        Args:
+            items_name (str): Name of the shared block with all the items, concatenated
+            offsets_name (str): Name of the shared block with the n_transactions + 1 offsets
+            n_transactions (int): Number of transactions
+        """
+    global _worker_transactions
+    items_shm = shared_memory.SharedMemory(name=items_name)
+    offsets_shm = shared_memory.SharedMemory(name=offsets_name)
+    try:
+        offsets = np.ndarray((n_transactions + 1,), dtype=np.int64, buffer=offsets_shm.buf).tolist()
+        items = np.ndarray((offsets[-1],), dtype=np.int64, buffer=items_shm.buf).tolist()
+    finally:
+        items_shm.close()
+        offsets_shm.close()
+    _worker_transactions = [items[offsets[i]:offsets[i + 1]] for i in range(n_transactions)]
+
+
+def parallel_count_supports(candidates_chunk):
     """
-        Wrapper function for parallel support counting.
+        Wrapper function for parallel support counting, run inside a Pool worker.
 
         Args:
-            args (tuple): Tuple of (candidates_chunk, transactions)
+            candidates_chunk (list): Candidate itemsets assigned to this task
 
         Returns:
             dict: Partial support counts for the chunk
         """
-    candidates_chunk, transactions = args
-    return count_supports_fast(candidates_chunk, transactions)
+    return count_supports_fast(candidates_chunk, _worker_transactions)
+
+
+def flatten_transactions(transactions):
+    """
+        Flatten the transactions into two arrays (CSR layout).
+
+        Args:
+            transactions (list): List of transactions
+
+        Returns:
+            tuple: (items, offsets) int64 arrays, transaction i being items[offsets[i]:offsets[i + 1]]
+        """
+    lengths = np.fromiter(map(len, transactions), dtype=np.int64, count=len(transactions))
+    offsets = np.zeros(len(transactions) + 1, dtype=np.int64)
+    np.cumsum(lengths, out=offsets[1:])
+    items = np.fromiter(chain.from_iterable(transactions), dtype=np.int64, count=int(offsets[-1]))
+    return items, offsets
+
+
+def _to_shared_memory(array):
+    """
+        Copy a NumPy array into a new shared memory block.
+
+        Args:
+            array (np.ndarray): Array to share
+
+        Returns:
+            SharedMemory: The block holding a copy of the array (caller must unlink it)
+        """
+    shm = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+    np.ndarray(array.shape, dtype=array.dtype, buffer=shm.buf)[:] = array
+    return shm
 
 
-def count_supports_parallel(candidates, transactions):
+@contextmanager
+def transaction_pool(transactions):
+    """
+        Start the worker Pool of count_supports_parallel.
+
+        The transactions are flattened into an items array plus an offsets array, placed
+        in shared memory and loaded once per worker, so only candidate chunks are pickled.
+        The shared memory is released when the pool is closed.
+
+        Args:
+            transactions (list): List of transactions
+
+        Yields:
+            Pool: The started pool, with the transactions loaded in every worker
+        """
+    items, offsets = flatten_transactions(transactions)
+    items_shm = _to_shared_memory(items)
+    offsets_shm = _to_shared_memory(offsets)
+    try:
+        # Spawned (not forked) workers: forking after the Numba thread pool has started
+        # (method="numba" earlier in the same process) is not safe and hangs at exit
+        with get_context("spawn").Pool(min(cpu_count(), 8), initializer=_init_worker,
+                initargs=(items_shm.name, offsets_shm.name, len(transactions))) as pool:
+            yield pool
+    finally:
+        for shm in (items_shm, offsets_shm):
+            shm.close()
+            shm.unlink()
+
+
+def count_supports_parallel(candidates, transactions, pool=None):
     """
         Distribute support counting across multiple CPU cores.
 
+        Starting a pool means spawning the workers, which import NumPy and Numba and
+        load the transactions: apriori starts one per run (see transaction_pool) and
+        passes it to every level.
+
         Args:
             candidates (set): All candidate itemsets
             transactions (list): List of transactions
+            pool (Pool, optional): Pool from transaction_pool(transactions); without it,
+                a pool is started for this call only
 
         Returns:
             dict: Combined support counts from all processes
         """
+    if pool is None:
+        with transaction_pool(transactions) as pool:
+            return count_supports_parallel(candidates, transactions, pool)
+
     n_cpus = min(cpu_count(), 8)
+    candidates = list(candidates)
     chunk_size = len(candidates) // n_cpus or 1
-    chunks = [list(candidates)[i:i + chunk_size] for i in range(0, len(candidates), chunk_size)]
-    with Pool(n_cpus) as pool:
-        results = pool.map(parallel_count_supports, [(chunk, transactions) for chunk in chunks])
+    chunks = [candidates[i:i + chunk_size] for i in range(0, len(candidates), chunk_size)]
+    results = pool.map(parallel_count_supports, chunks)
+
     final_counts = defaultdict(int)
     for r in results:
         for k, v in r.items():
@@ -173,7 +317,227 @@ def count_supports_parallel(candidates, transactions):
     return dict(final_counts)
 
 
-def apriori(transactions, min_support, max_k=None):
+def build_item_bitmaps(transactions, items):
+    """
+        Build the vertical bitmap layout: one bit per transaction for every item.
+
+        Args:
+            transactions (list): List of transactions
+            items (list): Items to index (usually the frequent 1-itemsets)
+
+        Returns:
+            tuple: (item_index, bitmaps) where item_index maps an item to its row and
+                bitmaps is a (len(items), ceil(n_transactions / 64)) uint64 array whose
+                bit tid is set when the transaction tid contains the item
+        """
+    item_index = {item: i for i, item in enumerate(items)}
+    n_words = (len(transactions) + 63) // 64
+    bitmaps = np.zeros((len(items), n_words), dtype=np.uint64)
+    if not items or not transactions:
+        return item_index, bitmaps
+
+    # Flatten the transactions into parallel (item, tid) arrays
+    lengths = np.fromiter(map(len, transactions), dtype=np.int64, count=len(transactions))
+    flat_items = np.fromiter(chain.from_iterable(transactions), dtype=np.int64, count=int(lengths.sum()))
+    tids = np.repeat(np.arange(len(transactions), dtype=np.int64), lengths)
+
+    # Map items to rows by binary search in the sorted indexed items (any item values,
+    # negative or huge, work), dropping the items that are not indexed
+    item_values = np.fromiter(items, dtype=np.int64, count=len(items))
+    order = np.argsort(item_values)
+    sorted_items = item_values[order]
+    pos = np.minimum(np.searchsorted(sorted_items, flat_items), len(items) - 1)
+    keep = sorted_items[pos] == flat_items
+    rows, tids = order[pos[keep]], tids[keep]
+
+    bits = np.left_shift(np.uint64(1), (tids & 63).astype(np.uint64))
+    np.bitwise_or.at(bitmaps, (rows, tids >> 6), bits)
+    return item_index, bitmaps
+
+
+def _popcount_rows(words):
+    """
+        Count the set bits of every row of a 2D uint64 array.
+
+        Args:
+            words (np.ndarray): Array of shape (n_rows, n_words)
+
+        Returns:
+            np.ndarray: Number of set bits per row
+        """
+    if hasattr(np, "bitwise_count"):  # NumPy >= 2.0
+        return np.bitwise_count(words).sum(axis=1, dtype=np.int64)
+    return np.unpackbits(words.view(np.uint8), axis=1).sum(axis=1, dtype=np.int64)
+
+
+def count_supports_bitmap(candidates, item_index, bitmaps):
+    """
+        Count support for candidate itemsets with bitwise AND + popcount over item bitmaps.
+
+        Candidates sharing the same (k-1)-prefix are counted together: the prefix
+        bitmap is computed once and ANDed with the bitmaps of all their last items.
+
+        Args:
+            candidates (set): Candidate itemsets to count (sorted tuples)
+            item_index (dict): Item to bitmap row, from build_item_bitmaps
+            bitmaps (np.ndarray): Item bitmaps, from build_item_bitmaps
+
+        Returns:
+            dict: Support counts for each candidate itemset
+        """
+    by_prefix = defaultdict(list)
+    for c in candidates:
+        by_prefix[c[:-1]].append(c)
+
+    counts = dict()
+    for prefix, group in by_prefix.items():
+        prefix_bitmap = bitmaps[item_index[prefix[0]]]
+        for item in prefix[1:]:
+            prefix_bitmap = prefix_bitmap & bitmaps[item_index[item]]
+        last_rows = [item_index[c[-1]] for c in group]
+        supports = _popcount_rows(bitmaps[last_rows] & prefix_bitmap)
+        counts.update(zip(group, supports.tolist()))
+    return counts
+
+
+def build_tidlists(transactions, items):
+    """
+        Build the vertical TID-list layout: the sorted ids of the transactions containing each item.
+
+        Args:
+            transactions (list): List of transactions
+            items (list): Items to index (usually the frequent 1-itemsets)
+
+        Returns:
+            dict: Maps every 1-itemset (item,) to a sorted int32 array of transaction ids
+        """
+    tids = {item: [] for item in items}
+    for tid, t in enumerate(transactions):
+        for item in t:
+            item_tids = tids.get(item)
+            if item_tids is not None:
+                item_tids.append(tid)
+    return {(item,): np.array(item_tids, dtype=np.int32) for item, item_tids in tids.items()}
+
+
+def count_supports_tidlist(candidates, tidlists, min_support):
+    """
+        Count support for candidate itemsets by intersecting TID-lists (Eclat-style).
+
+        The support of a candidate is the size of the intersection between the TID-list
+        of its (k-1)-prefix and the one of its last item. The TID-lists of the frequent
+        candidates are memoized in tidlists, so the next level finds its prefixes there.
+
+        Args:
+            candidates (set): Candidate itemsets to count (sorted tuples)
+            tidlists (dict): Itemset to sorted TID array, holding at least the 1-itemsets
+                and the (k-1)-itemsets; updated in place
+            min_support (int): Only candidates reaching it are memoized
+
+        Returns:
+            dict: Support counts for each candidate itemset
+        """
+    counts = dict()
+    for c in candidates:
+        tids = np.intersect1d(tidlists[c[:-1]], tidlists[c[-1:]], assume_unique=True)
+        counts[c] = tids.size
+        if tids.size >= min_support:
+            tidlists[c] = tids
+    return counts
+
+
+if njit is not None:
+    @njit(cache=True)
+    def _candidate_range(candidates, col, lo, hi, item):
+        """Sub-range of candidates[lo:hi] (sorted on column col within it) whose column col equals item."""
+        a, b = lo, hi
+        while a < b:  # lower bound
+            mid = (a + b) // 2
+            if candidates[mid, col] < item:
+                a = mid + 1
+            else:
+                b = mid
+        first = a
+        b = hi
+        while a < b:  # upper bound
+            mid = (a + b) // 2
+            if candidates[mid, col] <= item:
+                a = mid + 1
+            else:
+                b = mid
+        return first, a
+
+    @njit(parallel=True, cache=True)
+    def _count_supports_kernel(tx_items, tx_offsets, candidates, n_chunks):
+        """
+            Compiled support counting over the lexicographically sorted candidate rows.
+
+            Every (sorted) transaction is walked depth-first like a prefix tree: at depth d
+            the range of candidates matching the items chosen so far is narrowed by binary
+            search on column d, and a prefix is abandoned as soon as its range is empty.
+            Transactions are split in n_chunks interleaved chunks counted in parallel,
+            each into its own row of partial counts.
+            """
+        n_tx = tx_offsets.shape[0] - 1
+        n_cand, k = candidates.shape
+        partial = np.zeros((n_chunks, n_cand), dtype=np.int64)
+        for chunk in prange(n_chunks):
+            pos = np.empty(k, dtype=np.int64)
+            lo = np.empty(k, dtype=np.int64)
+            hi = np.empty(k, dtype=np.int64)
+            for i in range(chunk, n_tx, n_chunks):
+                start = tx_offsets[i]
+                n = tx_offsets[i + 1] - start
+                if n < k:
+                    continue
+                d = 0
+                pos[0] = -1
+                lo[0] = 0
+                hi[0] = n_cand
+                while d >= 0:
+                    pos[d] += 1
+                    # Out of positions, or past the largest item of the range: backtrack
+                    if pos[d] > n - k + d:
+                        d -= 1
+                        continue
+                    item = tx_items[start + pos[d]]
+                    if item > candidates[hi[d] - 1, d]:
+                        d -= 1
+                        continue
+                    a, b = _candidate_range(candidates, d, lo[d], hi[d], item)
+                    if a == b:
+                        continue
+                    if d == k - 1:
+                        partial[chunk, a] += 1
+                        continue
+                    d += 1
+                    pos[d] = pos[d - 1]
+                    lo[d] = a
+                    hi[d] = b
+        return partial.sum(axis=0)
+
+
+def count_supports_numba(candidates, tx_items, tx_offsets):
+    """
+        Count support for candidate itemsets with the compiled, parallel Numba kernel.
+
+        Args:
+            candidates (set): Candidate itemsets to count (sorted tuples)
+            tx_items (np.ndarray): Flattened sorted transactions, from flatten_transactions
+            tx_offsets (np.ndarray): Transaction offsets, from flatten_transactions
+
+        Returns:
+            dict: Support counts for each candidate itemset
+        """
+    if not candidates:
+        return dict()
+    ordered = sorted(candidates)
+    supports = _count_supports_kernel(tx_items, tx_offsets, np.array(ordered, dtype=np.int64),
+                                    get_num_threads())
+    return dict(zip(ordered, supports.tolist()))
+
+
+def apriori(transactions, min_support, max_k=None, method="bitmap"):
     """
     Main Apriori algorithm to find all frequent itemsets.
 
@@ -181,6 +545,11 @@ def apriori(transactions, min_support, max_k=None):
         transactions (list): List of transactions
         min_support (int): Minimum support count threshold
         max_k (int, optional): Maximum itemset size to mine
+        method (str): Support counting strategy, "bitmap" (vertical bitmaps, see
+            count_supports_bitmap), "tidlist" (TID-list intersections, see
+            count_supports_tidlist), "numba" (compiled transaction scan, see
+            count_supports_numba) or "parallel" (transaction scan on all cores,
+            see count_supports_parallel)
 
     Returns:
         dict: Dictionary containing frequent itemsets for each size k
@@ -188,22 +557,93 @@ def apriori(transactions, min_support, max_k=None):
 
     frequent_itemsets = dict()
     L1 = get_frequent_1_itemsets(transactions, min_support)
+    resources = ExitStack()  # (the worker pool of method="parallel")
+
+    if method == "bitmap":
+        item_index, bitmaps = build_item_bitmaps(transactions, [item for (item,) in L1])
+        count_supports = lambda candidates: count_supports_bitmap(candidates, item_index, bitmaps)
+    elif method == "tidlist":
+        tidlists = build_tidlists(transactions, [item for (item,) in L1])
+        count_supports = lambda candidates: count_supports_tidlist(candidates, tidlists, min_support)
+    elif method == "numba":
+        if njit is None:  # numba is not installed: same transaction scan, in Python
+            count_supports = lambda candidates: count_supports_fast(candidates, transactions)
+        else:
+            tx_items, tx_offsets = flatten_transactions(transactions)
+            count_supports = lambda candidates: count_supports_numba(candidates, tx_items, tx_offsets)
+    elif method == "parallel":
+        # One pool for the whole run, closed once the last level is counted
+        pool = resources.enter_context(transaction_pool(transactions))
+        count_supports = lambda candidates: count_supports_parallel(candidates, transactions, pool)
+    else:
+        raise ValueError(f"Unknown support counting method: {method}")
+
+    with resources:
+        k = 1
+        Lk = L1
+        if Lk:
+            frequent_itemsets[k] = Lk
+        while Lk:
+            k += 1
+            if max_k and k > max_k:
+                break
+            candidates = apriori_gen(Lk, k)
+            if not candidates:
+                break
+            counts = count_supports(candidates)
+            Lk = {c: cnt for c, cnt in counts.items() if cnt >= min_support}
+            if Lk:
+                frequent_itemsets[k] = Lk
+    return frequent_itemsets
+
+
+def check_support_counting(n_transactions=3000, n_items=40, min_support=60, seed=0):
+    """
+        Check every support counting method against the plain transaction scan.
+
+        count_supports_fast (the Python scan method="numba" runs without numba) is the
+        reference: on a small random dataset, every method must give its counts for
+        every candidate level, and apriori must find the same itemsets with every method.
+
+        Args:
+            n_transactions (int): Number of random transactions
+            n_items (int): Number of distinct items
+            min_support (int): Minimum support count threshold
+            seed (int): Seed of the random dataset
+
+        Raises:
+            AssertionError: If a method disagrees with the reference
+        """
+    rng = np.random.default_rng(seed)
+    # Item i drawn with probability ~ 1 / (i + 1), so that some itemsets stay frequent up
+    # to k = 5 or 6; repeated draws collapse, leaving transactions of 1 to ~15 items
+    weights = 1.0 / np.arange(1, n_items + 1)
+    weights /= weights.sum()
+    transactions = [sorted(set(rng.choice(n_items, rng.integers(1, 18), p=weights).tolist()))
+                    for _ in range(n_transactions)]
+
+    reference = {1: get_frequent_1_itemsets(transactions, min_support)}
+    frequent_items = [item for (item,) in reference[1]]
+    item_index, bitmaps = build_item_bitmaps(transactions, frequent_items)
+    tidlists = build_tidlists(transactions, frequent_items)
+    tx_items, tx_offsets = flatten_transactions(transactions)
     k = 1
-    Lk = L1
-    if Lk:
-        frequent_itemsets[k] = Lk
-    while Lk:
+    while reference[k]:
         k += 1
-        if max_k and k > max_k:
-            break
-        candidates = apriori_gen(Lk, k)
+        candidates = apriori_gen(reference[k - 1], k)
         if not candidates:
             break
-        counts = count_supports_parallel(candidates, transactions)
-        Lk = {c: cnt for c, cnt in counts.items() if cnt >= min_support}
-        if Lk:
-            frequent_itemsets[k] = Lk
-    return frequent_itemsets
+        counts = count_supports_fast(candidates, transactions)
+        assert count_supports_bitmap(candidates, item_index, bitmaps) == counts, ("bitmap", k)
+        assert count_supports_tidlist(candidates, tidlists, min_support) == counts, ("tidlist", k)
+        if njit is not None:
+            assert count_supports_numba(candidates, tx_items, tx_offsets) == counts, ("numba", k)
+        reference[k] = {c: cnt for c, cnt in counts.items() if cnt >= min_support}
+    reference = {k: Lk for k, Lk in reference.items() if Lk}
+
+    for method in ("bitmap", "tidlist", "numba", "parallel"):
+        assert apriori(transactions, min_support, method=method) == reference, method
+    return reference
 
 
 # =====================
@@ -223,8 +663,12 @@ def generate_association_rules(freq_itemsets, n_transactions, min_support, min_c
         list: List of association rules sorted by confidence and support
     """
 
-    support = {tuple(sorted(k)): v for k, v in
-            [(itemset, sup) for d in freq_itemsets.values() for itemset, sup in d.items()]}
+    # Itemsets from apriori are already canonical (sorted tuples), no need to re-sort them
+    support = {itemset: sup for d in freq_itemsets.values() for itemset, sup in d.items()}
+
+    # Supports of single items keyed by the item itself: hashing an int is cheaper than a tuple key
+    item_support = {item: sup for (item,), sup in freq_itemsets.get(1, {}).items()}
+
     rules = []
     for k, d in freq_itemsets.items():
         if k < 2:
@@ -232,18 +676,20 @@ def generate_association_rules(freq_itemsets, n_transactions, min_support, min_c
         for itemset_tuple, sup_J in d.items():
             if sup_J < min_support:
                 continue
-            items = tuple(sorted(itemset_tuple))
+            items = itemset_tuple
             n_items = len(items)
             for r in range(1, n_items):
-                for antecedent in combinations(items, r):
-                    antecedent = tuple(sorted(antecedent))
-                    consequent = tuple(sorted(set(items) - set(antecedent)))
-                    sup_A = support.get(antecedent, 0)
+                # combinations of a sorted tuple are sorted, and the i-th r-combination (in
+                # lexicographic order) is the complement of the i-th (n-r)-combination in
+                # reverse order: this pairs every antecedent with its sorted consequent
+                consequents = reversed(list(combinations(items, n_items - r)))
+                for antecedent, consequent in zip(combinations(items, r), consequents):
+                    sup_A = item_support.get(antecedent[0], 0) if r == 1 else support.get(antecedent, 0)
                     if sup_A == 0:
                         continue
                     confidence = sup_J / sup_A
                     if confidence >= min_confidence:
-                        sup_B = support.get(consequent, 0)
+                        sup_B = item_support.get(consequent[0], 0) if r == n_items - 1 else support.get(consequent, 0)
                         support_frac = sup_J / n_transactions
                         lift = (sup_J * n_transactions) / (sup_A * sup_B) if sup_B > 0 else None
                         rule = {
@@ -291,6 +737,12 @@ def save_rules_to_csv(rules, path):
 # MAIN EXECUTION
 # =====================
 if __name__ == "__main__":
+    if "--check" in sys.argv:
+        levels = check_support_counting()
+        print("Support counting methods agree (numba %s): %s itemsets per k"
+              % ("on" if njit is not None else "off", {k: len(Lk) for k, Lk in levels.items()}))
+        sys.exit(0)
+
     t0 = time()
     transactions = load_transactions(DATA_PATH)
     n_transactions = len(transactions)
@@ -0,0 +1,60 @@
+import os
+import numpy as np
+
+
+def text_to_binary(text_path, binary_path):
+    """
+    Converts a SNAP edge list (one "u v" pair per line, '#' for comments) into a binary
+    stream of int32 pairs, which read_binary can memory-map.
+    Like the notebook does while reading the text file, malformed lines (see
+    _parse_edge_lines) and self-loops are dropped, and every edge is written as
+    (min(u, v), max(u, v)).
+
+    :param text_path: Path of the edge list.
+    :param binary_path: Path of the binary file to write.
+    :return: The number of edges written.
+    """
+    try:
+        edges = np.loadtxt(text_path, dtype=np.int64, comments='#', usecols=(0, 1), ndmin=2)
+    except ValueError:
+        edges = _parse_edge_lines(text_path)
+    if len(edges) and (edges.min() < np.iinfo(np.int32).min or edges.max() > np.iinfo(np.int32).max):
+        raise ValueError("node ids must fit in 32 bits")
+
+    edges = edges[edges[:, 0] != edges[:, 1]]
+    edges.sort(axis=1)
+    edges.astype(np.int32).tofile(binary_path)
+    return len(edges)
+
+
+def _parse_edge_lines(text_path):
+    """
+    Reads an edge list line by line, as the notebook does: comment lines, lines with
+    less than two fields and lines whose first two fields are not integers are skipped.
+    Slower than np.loadtxt, only used when a file has such lines.
+
+    :return: The edges, as an (N, 2) int64 array.
+    """
+    edges = []
+    with open(text_path) as f:
+        for line in f:
+            if line.startswith('#'):
+                continue
+            parts = line.split()
+            if len(parts) < 2:
+                continue
+            try:
+                edges.append((int(parts[0]), int(parts[1])))
+            except ValueError:
+                continue  # malformed line
+    return np.array(edges, dtype=np.int64).reshape(-1, 2)
+
+
+def read_binary(binary_path):
+    """
+    Memory-maps a binary edge stream written by text_to_binary, as an (N, 2) int32 array.
+    Nothing is read from the file until the edges are used.
+    """
+    if os.path.getsize(binary_path) == 0:
+        return np.empty((0, 2), dtype=np.int32)  # an empty file cannot be mapped
+    return np.memmap(binary_path, dtype=np.int32, mode='r').reshape(-1, 2)
@@ -1,19 +1,33 @@
-import random
+import numpy as np
 
 class ReservoirSampling:
-    def __init__(self, memory_size):
+    __slots__ = ('M', 'sample', 'size', 't', 'rng', '_uniform', '_slot', '_next')
+
+    # Number of random draws made at once for add_item
+    RNG_BUFFER = 4096
+
+    def __init__(self, memory_size, seed=None):
         """
         Initializes the Reservoir Sampler.
+        The sample is a preallocated int64 array of M items, so it can also be updated in
+        place by the compiled TRIEST loops (which store every edge as one packed key,
+        (u << 32) | v, see Triest.EDGE_SHIFT).
         
         :param memory_size: The fixed size M of the reservoir.
+        :param seed: Seed of the NumPy generator used by add_item and decide_batch.
         """
         self.M = memory_size
-        self.sample = [] # Stores the actual elements (edges)
+        self.sample = np.zeros(memory_size, dtype=np.int64) # Stores the actual elements (edge keys)
+        self.size = 0    # The number of items in the sample (its first entries)
         self.t = 0       # The number of items seen so far
+        self.rng = np.random.default_rng(seed)
+        self._uniform = []  # buffered draws of add_item, consumed from _next
+        self._slot = []
+        self._next = 0
 
     def add_item(self, item):
         """
-        Processes an item (e.g., an edge) using the Reservoir Sampling algorithm.
+        Processes an integer item (e.g., an edge key) using the Reservoir Sampling algorithm.
         
         Returns a tuple: (added, removed_item)
         - added: Boolean, True if the new item was added to the sample.
@@ -22,16 +36,27 @@ class ReservoirSampling:
         self.t += 1
 
         # Fill the reservoir up to M
-        if len(self.sample) < self.M:
-            self.sample.append(item)
+        if self.size < self.M:
+            self.sample[self.size] = item
+            self.size += 1
             # Item added, nothing removed
             return True, None
+        if self.M == 0:
+            return False, None  # an empty reservoir never samples (and has no entry to draw)
+
+        # Refill the buffered draws (as Python numbers, cheaper to index than NumPy scalars)
+        if self._next == len(self._uniform):
+            self._uniform = self.rng.random(self.RNG_BUFFER).tolist()
+            self._slot = self.rng.integers(0, self.M, size=self.RNG_BUFFER).tolist()
+            self._next = 0
+        i = self._next
+        self._next += 1
 
         # Random replacement with probability M/t
-        if random.random() < (self.M / self.t):
+        if self._uniform[i] < (self.M / self.t):
             # Pick a random index to evict
-            idx = random.randint(0, self.M - 1)
-            removed_item = self.sample[idx]
+            idx = self._slot[i]
+            removed_item = int(self.sample[idx])
             
             # Replace the element
             self.sample[idx] = item
@@ -40,4 +65,33 @@ class ReservoirSampling:
             return True, removed_item
 
         # Item was skipped
-        return False, None
\ No newline at end of file
+        return False, None
+
+    def decide_batch(self, n):
+        """
+        Draws the Reservoir Sampling decisions for the next n items at once, with two
+        vectorized calls to the NumPy generator instead of one random() call per item.
+        Advances t by n, but leaves the sample to the caller: an item that is kept goes
+        to entry slot[i], evicting the item stored there if slot[i] < size (otherwise the
+        reservoir is still filling up and slot[i] is the next free entry).
+
+        Returns a tuple: (keep, slot)
+        - keep: Boolean array, True where the item is added to the sample.
+        - slot: Integer array, the entry of the sample each kept item is written to.
+        """
+        if self.M == 0:
+            # An empty reservoir never samples (and has no entry to draw)
+            self.t += n
+            return np.zeros(n, dtype=bool), np.zeros(n, dtype=np.int64)
+
+        t = np.arange(self.t + 1, self.t + n + 1)
+        keep = self.rng.random(n) < self.M / t
+        slot = self.rng.integers(0, self.M, size=n)
+
+        # The first items fill the reservoir up to M
+        n_fill = min(max(self.M - self.size, 0), n)
+        keep[:n_fill] = True
+        slot[:n_fill] = np.arange(self.size, self.size + n_fill)
+
+        self.t += n
+        return keep, slot
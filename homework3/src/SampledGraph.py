@@ -0,0 +1,364 @@
+from itertools import repeat
+import numpy as np
+
+try:
+    from numba import njit
+except ImportError:  # numba is optional, the segment kernels then run as plain Python
+    njit = None
+
+
+def _compiled(func):
+    """Compiles a segment kernel with Numba, when available."""
+    if njit is None:
+        return func
+    return njit(boundscheck=False, cache=True)(func)
+
+
+# -----------------------------------------------------------------
+# Segment kernels: vertex u owns the sorted neighbors nbrs[start[u]:start[u] + deg[u]],
+# with room for cap[u] of them. They are also called from the stream loops of TRIEST.
+# -----------------------------------------------------------------
+# Intersections switch from the linear merge to binary searches in the longer neighbor
+# list when it is more than GALLOP_RATIO times longer than the other one
+GALLOP_RATIO = 8
+
+
+@_compiled
+def segment_lower_bound(nbrs, lo, hi, v):
+    """
+    Binary search in the sorted nbrs[lo:hi].
+
+    :return: The first position in [lo, hi) whose value is not less than v, or hi.
+    """
+    while lo < hi:
+        mid = (lo + hi) >> 1
+        if nbrs[mid] < v:
+            lo = mid + 1
+        else:
+            hi = mid
+    return lo
+
+
+@_compiled
+def segment_find(nbrs, start, deg, u, v):
+    """
+    Binary search of v among the neighbors of u.
+
+    :return: The position of v in nbrs, or -1 if v is not a neighbor of u.
+    """
+    end = start[u] + deg[u]
+    pos = segment_lower_bound(nbrs, start[u], end, v)
+    if pos < end and nbrs[pos] == v:
+        return pos
+    return -1
+
+
+@_compiled
+def segment_room(deg, cap, u):
+    """
+    Number of free slots needed at the top of nbrs to insert one more neighbor of u.
+    """
+    if deg[u] < cap[u]:
+        return 0
+    return max(2 * cap[u], 4)
+
+
+@_compiled
+def segment_insert(nbrs, tri, start, deg, cap, top, u, v, w):
+    """
+    Inserts v among the sorted neighbors of u (nothing happens if it is already there),
+    with w triangles through the new edge. A full segment is first moved to the top of
+    nbrs with twice its capacity, the caller makes sure there is room for it (see segment_room).
+
+    :return: The new top of nbrs.
+    """
+    s = start[u]
+    d = deg[u]
+    pos = segment_lower_bound(nbrs, s, s + d, v)
+    if pos < s + d and nbrs[pos] == v:
+        return top
+    if d == cap[u]:
+        new_cap = max(2 * cap[u], 4)
+        nbrs[top:top + d] = nbrs[s:s + d]
+        tri[top:top + d] = tri[s:s + d]
+        pos += top - s
+        s = top
+        start[u] = top
+        cap[u] = new_cap
+        top += new_cap
+    for k in range(s + d, pos, -1):
+        nbrs[k] = nbrs[k - 1]
+        tri[k] = tri[k - 1]
+    nbrs[pos] = v
+    tri[pos] = w
+    deg[u] = d + 1
+    return top
+
+
+@_compiled
+def segment_delete(nbrs, tri, start, deg, u, v):
+    """
+    Deletes v from the sorted neighbors of u (nothing happens if it is not there).
+    """
+    pos = segment_find(nbrs, start, deg, u, v)
+    if pos < 0:
+        return
+    end = start[u] + deg[u] - 1
+    for k in range(pos, end):
+        nbrs[k] = nbrs[k + 1]
+        tri[k] = tri[k + 1]
+    deg[u] -= 1
+
+
+@_compiled
+def segment_next_common(nbrs, i, i_end, j, j_end, gallop):
+    """
+    Advances the two cursors of an intersection to the next common value of nbrs[i:i_end]
+    and nbrs[j:j_end]: by a two-pointer merge step, or with gallop by a binary search of
+    every nbrs[i] in the (much longer) second range.
+
+    :return: The positions (i, j) of the common value, with i == i_end when there is none.
+    """
+    if gallop:
+        while i < i_end:
+            j = segment_lower_bound(nbrs, j, j_end, nbrs[i])
+            if j == j_end:
+                return i_end, j
+            if nbrs[j] == nbrs[i]:
+                return i, j
+            i += 1
+        return i, j
+    while i < i_end and j < j_end:
+        a = nbrs[i]
+        b = nbrs[j]
+        if a == b:
+            return i, j
+        # Branch-free step: the cursor on the smaller value moves on
+        i += a < b
+        j += b < a
+    return i_end, j
+
+
+@_compiled
+def segment_intersect(nbrs, start, deg, u, v, out):
+    """
+    Intersection of the neighbors of u and v, writing the common ones in out (sorted).
+
+    :return: The number of common neighbors.
+    """
+    if deg[u] > deg[v]:
+        u, v = v, u
+    i = start[u]
+    i_end = i + deg[u]
+    j = start[v]
+    j_end = j + deg[v]
+    gallop = GALLOP_RATIO * deg[u] < deg[v]
+    n = 0
+    while True:
+        i, j = segment_next_common(nbrs, i, i_end, j, j_end, gallop)
+        if i == i_end:
+            return n
+        out[n] = nbrs[i]
+        n += 1
+        i += 1
+        j += 1
+
+
+@_compiled
+def segment_add_triangles(nbrs, tri, start, deg, u, v, out, delta):
+    """
+    segment_intersect that also adds delta to the triangle counts of the edges between
+    u, v and every common neighbor, i.e. of the other two edges of each triangle through (u, v).
+
+    :return: The number of common neighbors.
+    """
+    if deg[u] > deg[v]:
+        u, v = v, u
+    i = start[u]
+    i_end = i + deg[u]
+    j = start[v]
+    j_end = j + deg[v]
+    gallop = GALLOP_RATIO * deg[u] < deg[v]
+    n = 0
+    while True:
+        i, j = segment_next_common(nbrs, i, i_end, j, j_end, gallop)
+        if i == i_end:
+            return n
+        c = nbrs[i]
+        out[n] = c
+        n += 1
+        tri[i] += delta
+        tri[j] += delta
+        tri[segment_find(nbrs, start, deg, c, u)] += delta
+        tri[segment_find(nbrs, start, deg, c, v)] += delta
+        i += 1
+        j += 1
+
+
+@_compiled
+def segment_compact(nbrs, tri, start, deg, cap, new_cap, out, out_tri):
+    """
+    Copies the neighbors of every vertex into out (and their triangle counts into out_tri),
+    back to back, giving vertex u a segment of new_cap[u] slots. Drops the space left
+    behind by moved segments.
+
+    :return: The top of out.
+    """
+    top = 0
+    for u in range(deg.shape[0]):
+        d = deg[u]
+        if d > 0:  # (most vertices of a sparse stream are not in the sample at all)
+            out[top:top + d] = nbrs[start[u]:start[u] + d]
+            out_tri[top:top + d] = tri[start[u]:start[u] + d]
+        start[u] = top
+        cap[u] = new_cap[u]
+        top += new_cap[u]
+    return top
+
+
+class SampledGraph:
+    __slots__ = ('vid', 'nodes', 'start', 'deg', 'cap', 'nbrs', 'tri', 'top', 'scratch')
+
+    def __init__(self, n_vertices=1024, n_slots=4096):
+        """
+        Adjacency of the sampled graph, as a Structure of Arrays.
+
+        Nodes are remapped to dense vertex ids (0, 1, 2, ...). All the neighbor lists live
+        in one int32 buffer (nbrs), each vertex owning a sorted segment of it described by
+        start/deg/cap, so the whole graph can be handed to the Numba stream loops.
+        When the buffer is full it is compacted, so its size stays proportional to the
+        number of sampled edges (at most M) instead of growing with the stream.
+
+        :param n_vertices: Initial capacity of the per-vertex arrays.
+        :param n_slots: Initial size of the neighbor buffer.
+        """
+        self.vid = {}     # node -> dense vertex id
+        self.nodes = []   # dense vertex id -> node
+
+        self.start = np.zeros(n_vertices, dtype=np.int64)  # first slot of the segment
+        self.deg = np.zeros(n_vertices, dtype=np.int32)    # number of neighbors
+        self.cap = np.zeros(n_vertices, dtype=np.int32)    # size of the segment
+        self.nbrs = np.empty(n_slots, dtype=np.int32)
+        self.tri = np.empty(n_slots, dtype=np.int32)       # triangles through nbrs[i]
+        self.top = 0                                       # first never used slot of nbrs
+        self.scratch = np.empty(64, dtype=np.int32)        # output of common_neighbors
+
+    def vertex(self, node):
+        """
+        Returns the dense id of a node, giving the next free id to unseen nodes.
+        """
+        i = self.vid.get(node)
+        if i is None:
+            i = len(self.nodes)
+            if i == len(self.deg):
+                self._grow_vertices(2 * i)
+            self.vid[node] = i
+            self.nodes.append(node)
+        return i
+
+    def vertices(self, nodes, new=None):
+        """
+        Vectorized vertex(): returns the dense ids of an array of nodes, as np.int32.
+        The distinct nodes are looked up in one pass, then the unseen ones get their ids
+        all at once (in sorted order, like calling vertex on each distinct node).
+
+        :param new: Boolean array shaped like nodes, True where an unseen node gets an id.
+            The other unseen nodes stay out of the graph, with id -1 (default: all get one).
+        """
+        nodes = np.asarray(nodes)
+        uniq, inverse = np.unique(nodes, return_inverse=True)
+        inverse = inverse.reshape(nodes.shape)
+        uniq = uniq.tolist()
+        ids = np.fromiter(map(self.vid.get, uniq, repeat(-1)), dtype=np.int64, count=len(uniq))
+
+        unseen = ids < 0
+        if new is not None:
+            wanted = np.zeros(len(uniq), dtype=bool)
+            wanted[inverse[new]] = True
+            unseen &= wanted
+        added = np.flatnonzero(unseen)
+        if len(added):
+            first = len(self.nodes)
+            new_nodes = [uniq[k] for k in added.tolist()]
+            ids[added] = np.arange(first, first + len(added))
+            self.vid.update(zip(new_nodes, range(first, first + len(added))))
+            self.nodes.extend(new_nodes)
+            if len(self.nodes) > len(self.deg):
+                self._grow_vertices(max(2 * len(self.deg), len(self.nodes)))
+        return ids.astype(np.int32)[inverse]
+
+    def reserve(self, n_slots):
+        """
+        Makes sure that at least n_slots slots are free at the top of the neighbor buffer.
+
+        When they are not, the live segments are rewritten into a new buffer, each with
+        room for twice its neighbors, and the buffer is sized to twice what is then needed.
+        """
+        if self.top + n_slots <= len(self.nbrs):
+            return
+        new_cap = np.where(self.deg > 0, np.maximum(2 * self.deg, 4), 0).astype(np.int32)
+        nbrs = np.empty(2 * (int(new_cap.sum()) + n_slots), dtype=np.int32)
+        tri = np.empty(len(nbrs), dtype=np.int32)
+        self.top = segment_compact(self.nbrs, self.tri, self.start, self.deg, self.cap, new_cap, nbrs, tri)
+        self.nbrs = nbrs
+        self.tri = tri
+
+    def reserve_edge(self, u, v):
+        """
+        Makes sure that the edge between the vertices u and v can be inserted.
+        """
+        self.reserve(segment_room(self.deg, self.cap, u) + segment_room(self.deg, self.cap, v))
+
+    def add_edge(self, u, v, n_triangles=0):
+        """
+        Adds the undirected edge between the vertices u and v. Adding an edge twice has no effect.
+
+        :param n_triangles: The number of triangles through the new edge (see common_neighbors).
+        """
+        self.reserve_edge(u, v)
+        self.top = segment_insert(self.nbrs, self.tri, self.start, self.deg, self.cap, self.top, u, v, n_triangles)
+        self.top = segment_insert(self.nbrs, self.tri, self.start, self.deg, self.cap, self.top, v, u, n_triangles)
+
+    def remove_edge(self, u, v):
+        """
+        Removes the undirected edge between the vertices u and v, if present.
+        """
+        segment_delete(self.nbrs, self.tri, self.start, self.deg, u, v)
+        segment_delete(self.nbrs, self.tri, self.start, self.deg, v, u)
+
+    def common_neighbors(self, u, v, delta=0):
+        """
+        Returns the (sorted) vertices adjacent to both the vertices u and v.
+        The result is a view of a scratch buffer, only valid until the next call.
+
+        :param delta: Added to the triangle counts of the edges from u and v to the common
+                      neighbors: +1 before adding the edge (u, v), -1 before removing it.
+        """
+        d = min(self.deg[u], self.deg[v])
+        if d == 0:
+            return self.scratch[:0]  # a vertex without neighbors, no need to call the kernel
+        if d > len(self.scratch):
+            self.scratch = np.empty(2 * d, dtype=np.int32)
+        out = self.scratch
+        if delta:
+            n = segment_add_triangles(self.nbrs, self.tri, self.start, self.deg, u, v, out, delta)
+        else:
+            n = segment_intersect(self.nbrs, self.start, self.deg, u, v, out)
+        return out[:n]
+
+    def triangles(self, u, v):
+        """
+        Returns the number of triangles through the edge between u and v, or -1 if there is no such edge.
+        """
+        pos = segment_find(self.nbrs, self.start, self.deg, u, v)
+        if pos < 0:
+            return -1
+        return int(self.tri[pos])
+
+    def _grow_vertices(self, n_vertices):
+        """Enlarges the per-vertex arrays, new vertices have no neighbors."""
+        for name in ("start", "deg", "cap"):
+            old = getattr(self, name)
+            new = np.zeros(n_vertices, dtype=old.dtype)
+            new[:len(old)] = old
+            setattr(self, name, new)
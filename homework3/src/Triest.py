@@ -0,0 +1,280 @@
+from abc import ABC, abstractmethod
+from collections import defaultdict
+import numpy as np
+from src.EdgeFile import read_binary
+from src.ReservoirSampling import ReservoirSampling
+from src.SampledGraph import SampledGraph
+
+try:
+    from numba import njit
+except ImportError:  # numba is optional, process_batch falls back to _process_edge
+    njit = None
+
+
+class Triest(ABC):
+    # Fixed attribute sets (see also the subclasses): no per-instance __dict__
+    __slots__ = ('M', '_reservoir', '_graph', '_local_triangles', '_pending')
+
+    # The reservoir stores the edge (u, v) of dense vertex ids as the key (u << EDGE_SHIFT) | v
+    EDGE_SHIFT = 32
+    EDGE_MASK = (1 << EDGE_SHIFT) - 1
+
+    # Number of edges process_edge collects before running them through process_batch
+    PENDING_EDGES = 1 << 16
+
+    # Whether an edge that is not sampled still updates the counters (TRIEST-IMPR),
+    # otherwise process_batch drops such edges before the compiled loop
+    COUNTS_UNSAMPLED_EDGES = True
+
+    def __init__(self, M, local_dtype):
+        """
+        State and stream handling shared by TRIEST-BASE and TRIEST-IMPR.
+        Subclasses implement _process_edge (the step of one edge in Python), get_estimation
+        and _stream (their compiled loop).
+
+        :param M: Fixed memory size (number of edges to store in sample).
+        :param local_dtype: NumPy type of the local counters.
+        """
+        self.M = M
+        # The reservoir object manages the sample and its own time 't'
+        # (edges are stored as packed keys of the dense vertex ids of self._graph)
+        self._reservoir = ReservoirSampling(M)
+
+        # Adjacency of the *sampled* graph
+        self._graph = SampledGraph()
+
+        # Local counters, indexed by dense vertex id
+        self._local_triangles = np.zeros(len(self._graph.deg), dtype=local_dtype)
+
+        # Endpoints of the edges given to process_edge and not processed yet (see flush)
+        self._pending = []
+
+    @property
+    def reservoir(self):
+        """The ReservoirSampling of the stream, up to date with every edge given so far."""
+        self.flush()
+        return self._reservoir
+
+    @property
+    def graph(self):
+        """The SampledGraph of the sample, up to date with every edge given so far."""
+        self.flush()
+        return self._graph
+
+    @property
+    def global_triangles(self):
+        """The global counter, up to date with every edge given so far."""
+        self.flush()
+        return self._global_triangles
+
+    @property
+    def local_triangles(self):
+        """
+        The local counters keyed by node, as a defaultdict(int) like before the counters
+        moved to an array indexed by dense vertex id: a copy of get_local_triangles(),
+        up to date with every edge given so far.
+        """
+        return defaultdict(int, self.get_local_triangles())
+
+    def _get_common_neighbors(self, u, v, delta=0):
+        """Helper to find shared neighbors of two dense vertex ids in the sampled graph (self._graph)."""
+        return self._graph.common_neighbors(u, v, delta)
+
+    def process_edge(self, u, v):
+        """
+        Main stream processing loop.
+        Feeds the new edge (u, v) to the algorithm. With numba, the edge is only queued:
+        the queued edges run through process_batch PENDING_EDGES at a time, and before
+        anything reads the state (get_estimation, get_local_triangles or the reservoir,
+        graph, global_triangles and local_triangles attributes), so a stream fed one edge
+        at a time still runs in the compiled loop.
+        The first batch of a fresh install compiles that loop, which takes several
+        seconds; the compiled code is then cached on disk (cache=True) for later runs.
+        """
+        if njit is None:
+            self._process_edge(u, v)
+            return
+        pending = self._pending
+        pending += u, v  # (flat: one list of ints converts to an array much faster than pairs)
+        if len(pending) >= 2 * self.PENDING_EDGES:
+            self.flush()
+
+    def flush(self):
+        """
+        Processes the edges queued by process_edge.
+        """
+        if self._pending:
+            edges = np.array(self._pending).reshape(-1, 2)
+            self._pending = []
+            self.process_batch(edges)
+
+    def process_batch(self, edges):
+        """
+        Processes a batch of streamed edges, like calling process_edge on each of them.
+        All the reservoir decisions are drawn at once and the edges are remapped to dense
+        vertex ids, then the batch runs in a single compiled loop (without numba,
+        _process_edge is called for every edge).
+
+        :param edges: Array of shape (N, 2) with the endpoints of the edges, in stream order.
+        """
+        self.flush()  # the edges queued by process_edge come first
+
+        # Canonical orientation (u < v) of every edge, as in _process_edge
+        edges = np.sort(np.asarray(edges).reshape(-1, 2), axis=1)
+        if njit is None:
+            for u, v in edges.tolist():
+                self._process_edge(u, v)
+            return
+
+        r = self._reservoir
+        steps = np.arange(r.t + 1, r.t + len(edges) + 1)
+        keep, slot = r.decide_batch(len(edges))
+        if not self.COUNTS_UNSAMPLED_EDGES:
+            edges, slot, steps = edges[keep], slot[keep], steps[keep]
+            keep = keep[keep]
+
+        # Only the endpoints of kept edges enter the sampled graph, the other nodes get no
+        # dense id (-1). An edge with such an endpoint is not kept and has no common
+        # neighbors in the sample, so it changes nothing and the compiled loop skips it
+        edges = self._graph.vertices(edges, np.column_stack((keep, keep)))
+        live = edges.min(axis=1) >= 0
+        if not live.all():
+            edges, keep, slot, steps = edges[live], keep[live], slot[live], steps[live]
+        self._grow_local_triangles()
+
+        i = 0
+        while i < len(edges):
+            i = self._stream(edges, i, keep, slot, steps)
+            if i < len(edges):
+                self._graph.reserve_edge(edges[i, 0], edges[i, 1])
+
+    def process_file(self, path, chunk_size=1 << 20):
+        """
+        Processes a binary edge stream written by EdgeFile.text_to_binary. The file is
+        memory-mapped and fed to process_batch chunk_size edges at a time, so the edges
+        never become Python objects (and the whole stream never sits in memory at once).
+
+        :param path: Path of the binary file, int32 pairs in stream order.
+        :param chunk_size: Number of edges per batch.
+        """
+        edges = read_binary(path)
+        for begin in range(0, len(edges), chunk_size):
+            self.process_batch(edges[begin:begin + chunk_size])
+
+    def get_local_triangles(self):
+        """
+        Returns the local (per node) counters, as a dict {node: count}.
+        """
+        self.flush()
+        nodes = self._graph.nodes
+        return {nodes[i]: c for i, c in enumerate(self._local_triangles[:len(nodes)].tolist()) if c}
+
+    @abstractmethod
+    def get_estimation(self):
+        """
+        Returns the estimated global triangle count, after processing the queued edges.
+        """
+
+    @abstractmethod
+    def _process_edge(self, u, v):
+        """
+        Processes one edge in Python: the step process_edge and process_batch run for
+        every edge without numba.
+        """
+
+    @abstractmethod
+    def _stream(self, edges, i, keep, slot, steps):
+        """
+        Runs the compiled loop of the algorithm over edges[i:] (see process_batch),
+        steps[i] being the time step of edges[i].
+
+        :return: The position the loop stopped at, to resume after enlarging the graph.
+        """
+
+    def _grow_local_triangles(self):
+        """Keeps one local counter for every vertex slot of self._graph."""
+        if len(self._local_triangles) < len(self._graph.deg):
+            local = np.zeros(len(self._graph.deg), dtype=self._local_triangles.dtype)
+            local[:len(self._local_triangles)] = self._local_triangles
+            self._local_triangles = local
+
+
+
+def check_stream_paths(n_nodes=30, n_edges=300, seed=0):
+    """
+    Checks the compiled stream loops (process_edge with numba) against the Python step
+    (_process_edge, which is what runs without numba). The queue is shortened to 16 edges,
+    so process_edge flushes many times along the stream.
+
+    On a stream where some edges come back (in both orientations), with M >= the stream
+    length, every edge is sampled and both paths must give the same counters, also when
+    process_edge and process_batch take turns.
+    With a smaller M (down to 0) the two paths draw differently: on a stream of distinct
+    edges, each TRIEST-BASE counter is checked against the triangles of its own sample.
+
+    :raises AssertionError: If a path disagrees.
+    """
+    from src.TriestBase import TriestBase
+    from src.TriestImpr import TriestImpr
+
+    rng = np.random.default_rng(seed)
+    pairs = np.array([(u, v) for u in range(n_nodes) for v in range(u + 1, n_nodes)])
+    distinct = pairs[rng.permutation(len(pairs))[:n_edges]]
+    distinct[::2] = distinct[::2, ::-1]
+    repeated = np.concatenate([distinct, distinct[::4], distinct[1::4, ::-1]])
+    repeated = repeated[rng.permutation(len(repeated))]
+
+    def run(cls, M, edges):
+        """Feeds edges to process_edge (compiled) and _process_edge (Python) of two instances."""
+        queued = type(cls.__name__, (cls,), {'__slots__': (), 'PENDING_EDGES': 16})
+        compiled, python = queued(M), cls(M)
+        for k, (u, v) in enumerate(edges.tolist()):
+            compiled.process_edge(u, v)
+            python._process_edge(u, v)
+            if k % 97 == 0:
+                compiled.global_triangles  # (reading the state flushes the queue too)
+        for t in (compiled, python):
+            assert t.reservoir.t == len(edges) and t.reservoir.size == min(M, len(edges)), (cls, M)
+            if M < 2:  # no two sampled edges, no wedge
+                assert t.global_triangles == 0 and not t.get_local_triangles(), (cls, M)
+        return compiled, python
+
+    def sampled_triangles(t):
+        """Global and local ({node: count}) triangles of the sampled graph of t, from scratch."""
+        g = t.graph
+        adj = [set(g.nbrs[g.start[u]:g.start[u] + g.deg[u]].tolist()) for u in range(len(g.nodes))]
+        n, local = 0, {}
+        for u in range(len(adj)):
+            for v in adj[u]:
+                for w in adj[u] & adj[v]:
+                    if u < v < w:
+                        n += 1
+                        for x in (u, v, w):
+                            local[g.nodes[x]] = local.get(g.nodes[x], 0) + 1
+        return n, local
+
+    for cls in (TriestBase, TriestImpr):
+        for M in (len(repeated), 10 * len(repeated)):
+            compiled, python = run(cls, M, repeated)
+            # Runs of 7 edges, alternately queued and given to process_batch
+            mixed = cls(M)
+            for k in range(0, len(repeated), 7):
+                if k % 2:
+                    mixed.process_batch(repeated[k:k + 7])
+                else:
+                    for u, v in repeated[k:k + 7].tolist():
+                        mixed.process_edge(u, v)
+            for t in (compiled, mixed):
+                assert np.isclose(t.get_estimation(), python.get_estimation()), (cls, M)
+                a, b = t.get_local_triangles(), python.get_local_triangles()
+                assert a.keys() == b.keys() and all(np.isclose(a[x], b[x]) for x in a), (cls, M)
+        for M in (0, 1, 2, 3, 40, 150):
+            for t in run(cls, M, distinct):
+                if cls is TriestBase:
+                    assert sampled_triangles(t) == (t.global_triangles, t.get_local_triangles()), (cls, M)
+
+
+if __name__ == "__main__":
+    # python -m src.Triest (from homework3)
+    check_stream_paths()
+    print("Compiled and Python stream paths agree (numba %s)" % ("on" if njit is not None else "off"))
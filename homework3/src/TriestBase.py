@@ -1,86 +1,177 @@
-import random
-from collections import defaultdict
-from src.ReservoirSampling import ReservoirSampling
+import numpy as np
+from src.Triest import Triest
+from src.SampledGraph import (segment_find, segment_room, segment_insert, segment_delete,
+                              segment_intersect, segment_add_triangles)
+
+try:
+    from numba import njit
+except ImportError:  # numba is optional, process_batch falls back to _process_edge
+    njit = None
+
+
+if njit is not None:
+    @njit(boundscheck=False, cache=True)
+    def _triest_base_stream(edges, i, keep, slot, sample, n_sample,
+                            nbrs, tri, start, deg, cap, top, local_triangles, global_triangles):
+        """
+        Compiled TRIEST-BASE loop over edges[i:] (dense vertex ids), same steps as _process_edge.
+        The reservoir decisions come precomputed from ReservoirSampling.decide_batch,
+        the sample holds packed edge keys (u << 32) | v.
+        An evicted edge is only intersected when tri says it closes some triangle.
+
+        Stops early if an edge could need more free slots than the top of nbrs has left,
+        so the caller can enlarge the buffer and resume from the returned position.
+        """
+        common = np.empty(sample.shape[0], dtype=np.int32)
+        while i < edges.shape[0]:
+            u = edges[i, 0]
+            v = edges[i, 1]
+            if top + segment_room(deg, cap, u) + segment_room(deg, cap, v) > nbrs.shape[0]:
+                break
+            kept = keep[i]
+            s = slot[i]
+            i += 1
+            if not kept:
+                continue
+
+            if s < n_sample:
+                ru = sample[s] >> 32
+                rv = sample[s] & 0xffffffff
+                pos = segment_find(nbrs, start, deg, ru, rv)
+
+                # UPDATE COUNTERS(-, (u', v')), then remove the edge
+                if pos < 0:
+                    n = segment_intersect(nbrs, start, deg, ru, rv, common)
+                elif tri[pos] > 0:
+                    n = segment_add_triangles(nbrs, tri, start, deg, ru, rv, common, -1)
+                else:
+                    n = 0
+                global_triangles -= n
+                local_triangles[ru] -= n
+                local_triangles[rv] -= n
+                for k in range(n):
+                    local_triangles[common[k]] -= 1
+                segment_delete(nbrs, tri, start, deg, ru, rv)
+                segment_delete(nbrs, tri, start, deg, rv, ru)
+            else:
+                n_sample += 1
+
+            # UPDATE COUNTERS(+, (u, v)), then add the edge
+            new = segment_find(nbrs, start, deg, u, v) < 0
+            if new:
+                n = segment_add_triangles(nbrs, tri, start, deg, u, v, common, 1)
+            else:
+                n = segment_intersect(nbrs, start, deg, u, v, common)
+            global_triangles += n
+            local_triangles[u] += n
+            local_triangles[v] += n
+            for k in range(n):
+                local_triangles[common[k]] += 1
+            if new:
+                top = segment_insert(nbrs, tri, start, deg, cap, top, u, v, n)
+                top = segment_insert(nbrs, tri, start, deg, cap, top, v, u, n)
+            sample[s] = (np.int64(u) << 32) | v
+        return i, top, n_sample, global_triangles
+
+
+class TriestBase(Triest):
+    __slots__ = ('_global_triangles',)
+
+    # An edge that is not sampled changes nothing (see Triest.process_batch)
+    COUNTS_UNSAMPLED_EDGES = False
 
-class TriestBase:
     def __init__(self, M):
         """
         Initialize TRIEST-BASE (Algorithm 1).
         
         :param M: Fixed memory size (number of edges to store in sample).
         """
-        self.M = M
-        # The reservoir object now manages the sample and its own time 't'
-        self.reservoir = ReservoirSampling(M)
+        super().__init__(M, np.int64)
         
-        # Adjacency list for the *sampled* graph
-        self.adj = defaultdict(set) 
-        
-        # Counters for sampled triangles
-        self.global_triangles = 0
-        self.local_triangles = defaultdict(int)
-
-    def get_common_neighbors(self, u, v):
-        """Helper to find shared neighbors in the sampled graph (self.adj)."""
-        if u in self.adj and v in self.adj:
-            return self.adj[u].intersection(self.adj[v])
-        return set()
-
-    def update_counters(self, u, v, is_addition=True):
-        """Updates global and local counters based on common neighbors in S."""
-        common = self.get_common_neighbors(u, v)
+        # Counter for sampled triangles (the local ones are set up by Triest)
+        self._global_triangles = 0
+
+    def _update_counters(self, u, v, is_addition=True):
+        """
+        Updates global and local counters based on common neighbors in S (dense vertex ids), and returns them.
+        The triangle counts of the sampled graph follow, unless the edge is already in it (or no longer).
+        """
         change = 1 if is_addition else -1
+        in_graph = self._graph.triangles(u, v) >= 0
+        common = self._get_common_neighbors(u, v, change if in_graph != is_addition else 0)
+        if not len(common):
+            return common
         
-        for c in common:
-            self.global_triangles += change
-            self.local_triangles[u] += change
-            self.local_triangles[v] += change
-            self.local_triangles[c] += change
+        # Every common neighbor closes one triangle (the common neighbors are distinct,
+        # so the fancy-indexed update does not need np.add.at)
+        local = self._local_triangles
+        n = change * len(common)
+        self._global_triangles += n
+        local[u] += n
+        local[v] += n
+        local[common] += change
+        return common
 
-    def process_edge(self, u, v):
+    def _process_edge(self, u, v):
         """
-        Main stream processing loop.
+        One step of the stream processing loop, in Python (see Triest.process_edge).
         Feeds the new edge to the reservoir and updates graph state accordingly.
         """
-        edge = (u, v)
+        # Canonical orientation (u < v), so that an undirected edge is always stored the same way
+        if u > v:
+            u, v = v, u
+        graph = self._graph  # (local name, read several times per edge)
+        u = graph.vertex(u)
+        v = graph.vertex(v)
+        self._grow_local_triangles()
         
         # The reservoir's internal time 't' is incremented here
-        added, removed_item = self.reservoir.add_item(edge)
+        added, removed_item = self._reservoir.add_item((u << self.EDGE_SHIFT) | v)
 
         # Handle edge removal (if reservoir was full and kicked one out)
-        if removed_item:
-            ru, rv = removed_item
+        if removed_item is not None:
+            ru = removed_item >> self.EDGE_SHIFT
+            rv = removed_item & self.EDGE_MASK
             
             # Decrement counters for the removed edge
             # This is the "UPDATE COUNTERS(-, (u', v'))" step
-            self.update_counters(ru, rv, is_addition=False)
+            # (skipped when the graph knows that the edge closes no triangle)
+            if graph.triangles(ru, rv) != 0:
+                self._update_counters(ru, rv, is_addition=False)
             
-            # Remove from adjacency list
-            self.adj[ru].discard(rv)
-            self.adj[rv].discard(ru)
-            if not self.adj[ru]: del self.adj[ru]
-            if not self.adj[rv]: del self.adj[rv]
+            # Remove from the sampled graph
+            graph.remove_edge(ru, rv)
 
         # Handle edge addition (if the new edge was kept)
         if added:
             # Increment counters for the new edge
             # This is the "UPDATE COUNTERS(+, (u, v))" step
-            self.update_counters(u, v, is_addition=True)
+            common = self._update_counters(u, v, is_addition=True)
             
-            # Add to adjacency list
-            self.adj[u].add(v)
-            self.adj[v].add(u)
+            # Add to the sampled graph
+            graph.add_edge(u, v, len(common))
+
+    def _stream(self, edges, i, keep, slot, steps):
+        """Runs _triest_base_stream on the reservoir and the sampled graph."""
+        r = self._reservoir
+        g = self._graph
+        i, g.top, r.size, self._global_triangles = _triest_base_stream(
+            edges, i, keep, slot, r.sample, r.size,
+            g.nbrs, g.tri, g.start, g.deg, g.cap, g.top, self._local_triangles, self._global_triangles)
+        return i
 
     def get_estimation(self):
         """
         Returns the estimated global triangle count.
         Formula: xi * tau.
         """
+        self.flush()  # (the edges still queued by process_edge)
+
         # Get the current time 't' from the reservoir object
-        t = self.reservoir.t
+        t = self._reservoir.t
         
         if t <= self.M:
-            return self.global_triangles
+            return self._global_triangles
         
         # Ensure M is large enough for the formula
         if self.M < 3:
@@ -88,4 +179,4 @@ class TriestBase:
 
         # Scaling factor xi
         xi = (t * (t - 1) * (t - 2)) / (self.M * (self.M - 1) * (self.M - 2))
-        return xi * self.global_triangles
\ No newline at end of file
+        return xi * self._global_triangles
@@ -1,73 +1,144 @@
-import random
-from collections import defaultdict
-from src.ReservoirSampling import ReservoirSampling
+import numpy as np
+from src.Triest import Triest
+from src.SampledGraph import segment_room, segment_insert, segment_delete, segment_intersect
+
+try:
+    from numba import njit
+except ImportError:  # numba is optional, process_batch falls back to _process_edge
+    njit = None
+
+
+if njit is not None:
+    @njit(boundscheck=False, cache=True)
+    def _triest_impr_stream(edges, i, keep, slot, steps, sample, n_sample,
+                            nbrs, tri, start, deg, cap, top, local_triangles, global_triangles):
+        """
+        Compiled TRIEST-IMPR loop over edges[i:] (dense vertex ids), same steps as _process_edge.
+        The reservoir decisions come precomputed from ReservoirSampling.decide_batch,
+        steps[i] is the time step of edges[i] and the sample holds packed edge keys (u << 32) | v.
+
+        Stops early if an edge could need more free slots than the top of nbrs has left,
+        so the caller can enlarge the buffer and resume from the returned position.
+        """
+        M = sample.shape[0]
+        inv_MM1 = 1.0 / max(M * (M - 1), 1)
+        common = np.empty(M, dtype=np.int32)
+        while i < edges.shape[0]:
+            u = edges[i, 0]
+            v = edges[i, 1]
+            if top + segment_room(deg, cap, u) + segment_room(deg, cap, v) > nbrs.shape[0]:
+                break
+            kept = keep[i]
+            s = slot[i]
+            t = steps[i]
+            i += 1
+
+            # Weighted update BEFORE modifying the sample
+            if t <= M:
+                eta = 1.0
+            else:
+                eta = (t - 1) * (t - 2) * inv_MM1
+            n = segment_intersect(nbrs, start, deg, u, v, common)
+            global_triangles += eta * n
+            local_triangles[u] += eta * n
+            local_triangles[v] += eta * n
+            for k in range(n):
+                local_triangles[common[k]] += eta
+
+            if not kept:
+                continue
+            if s < n_sample:
+                ru = sample[s] >> 32
+                rv = sample[s] & 0xffffffff
+                segment_delete(nbrs, tri, start, deg, ru, rv)
+                segment_delete(nbrs, tri, start, deg, rv, ru)
+            else:
+                n_sample += 1
+
+            top = segment_insert(nbrs, tri, start, deg, cap, top, u, v, 0)
+            top = segment_insert(nbrs, tri, start, deg, cap, top, v, u, 0)
+            sample[s] = (np.int64(u) << 32) | v
+        return i, top, n_sample, global_triangles
+
+
+class TriestImpr(Triest):
+    __slots__ = ('_inv_MM1', '_global_triangles')
 
-class TriestImpr:
     def __init__(self, M):
         """
         Initialize TRIEST-IMPR (Algorithm 2).
         
         :param M: Fixed memory size (number of edges to store in sample).
         """
-        self.M = M
-        # The reservoir object handles the sampling logic and time 't'
-        self.reservoir = ReservoirSampling(M)
+        super().__init__(M, np.float64)
         
-        self.adj = defaultdict(set)
-        self.global_triangles = 0.0 
-        self.local_triangles = defaultdict(float)
-
-    def get_common_neighbors(self, u, v):
-        """Helper to find shared neighbors in the sampled graph (self.adj)."""
-        if u in self.adj and v in self.adj:
-            return self.adj[u].intersection(self.adj[v])
-        return set()
+        # 1 / (M * (M - 1)) for the weights eta (M = 1 would divide by zero)
+        self._inv_MM1 = 1.0 / max(M * (M - 1), 1)
+        self._global_triangles = 0.0 
 
-    def process_edge(self, u, v):
+    def _process_edge(self, u, v):
         """
-        TRIEST-IMPR Processing Logic.
+        TRIEST-IMPR Processing Logic, for one edge in Python (see Triest.process_edge).
         Updates counters unconditionally before sampling.
         """
+        # Canonical orientation (u < v), so that an undirected edge is always stored the same way
+        if u > v:
+            u, v = v, u
+        graph = self._graph  # (local names, read several times per edge)
+        reservoir = self._reservoir
+        u = graph.vertex(u)
+        v = graph.vertex(v)
+        self._grow_local_triangles()
+
         # Calculate the current time step 't'
-        t = self.reservoir.t + 1
+        t = reservoir.t + 1
         
         # Unconditional Weighted Update
-        # Calculate weight eta
-        if t <= self.M:
-            eta = 1.0
-        else:
-            eta = ((t - 1) * (t - 2)) / (self.M * (self.M - 1))
-            eta = max(1.0, eta)
-
         # Update counters with the weight 'eta' BEFORE modifying the sample
-        common = self.get_common_neighbors(u, v)
-        for c in common:
-            val = eta
-            self.global_triangles += val
-            self.local_triangles[u] += val
-            self.local_triangles[v] += val
-            self.local_triangles[c] += val
+        # (every common neighbor closes a triangle worth eta: u, v and the global
+        # counter get eta * |common| at once, each common neighbor gets eta)
+        common = self._get_common_neighbors(u, v)
+        if len(common):
+            # Calculate weight eta (for t > M, (t-1)(t-2) >= M(M-1) so it is never below 1)
+            if t <= self.M:
+                eta = 1.0
+            else:
+                eta = (t - 1) * (t - 2) * self._inv_MM1
+
+            local = self._local_triangles
+            val = eta * len(common)
+            self._global_triangles += val
+            local[u] += val
+            local[v] += val
+            local[common] += eta
 
         # Reservoir Sampling Logic
         # We pass the edge to the reservoir logic
-        added, removed_item = self.reservoir.add_item((u, v))
+        added, removed_item = reservoir.add_item((u << self.EDGE_SHIFT) | v)
 
         # Handle Removal (IMPR does NOT decrement counters when removing)
-        if removed_item:
-            ru, rv = removed_item
-            self.adj[ru].discard(rv)
-            self.adj[rv].discard(ru)
-            if not self.adj[ru]: del self.adj[ru]
-            if not self.adj[rv]: del self.adj[rv]
+        if removed_item is not None:
+            ru = removed_item >> self.EDGE_SHIFT
+            rv = removed_item & self.EDGE_MASK
+            graph.remove_edge(ru, rv)
 
         # Handle Addition (Update adjacency list)
         if added:
-            self.adj[u].add(v)
-            self.adj[v].add(u)
+            graph.add_edge(u, v)
 
     def get_estimation(self):
         """
         Returns the global estimation. 
         [cite_start]For IMPR, the counter itself is the estimator[cite: 609].
         """
-        return self.global_triangles
\ No newline at end of file
+        self.flush()  # (the edges still queued by process_edge)
+        return self._global_triangles
+
+    def _stream(self, edges, i, keep, slot, steps):
+        """Runs _triest_impr_stream on the reservoir and the sampled graph."""
+        r = self._reservoir
+        g = self._graph
+        i, g.top, r.size, self._global_triangles = _triest_impr_stream(
+            edges, i, keep, slot, steps, r.sample, r.size,
+            g.nbrs, g.tri, g.start, g.deg, g.cap, g.top, self._local_triangles, self._global_triangles)
+        return i